@@ -4,7 +4,7 @@ Multi-agent orchestration library.
 from .spec_parser import SpecParser, ProjectSpec, AgentTask
 from .task_analyzer import TaskAnalyzer
 from .tmux_manager import TmuxManager
-from .agent_spawner import AgentSpawner
+from .agent_spawner import AgentSpawner, AgentInvocation
 
 __all__ = [
     'SpecParser',
@@ -13,4 +13,5 @@ __all__ = [
     'TaskAnalyzer',
     'TmuxManager',
     'AgentSpawner',
+    'AgentInvocation',
 ]
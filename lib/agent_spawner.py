@@ -4,10 +4,76 @@ Agent spawner - launches Claude Code agents with appropriate context.
 """
 import os
 import json
-from typing import Dict, List, Optional
+import functools
+import shlex
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 
 
+# Markdown files that live alongside agent specs but are not agents themselves
+_SKIP_FILES = frozenset({"readme.md", "claude.md", "workplan.template.md"})
+
+# Static parts of the per-agent workspace file, pre-encoded once
+_WORKSPACE_DEFAULT_TASKS = b"See WORKPLAN.md in the project directory for your tasks.\n"
+_WORKSPACE_TEMPLATE_SUFFIX = b"""
+
+## Instructions
+
+1. Read the WORKPLAN.md in the project directory
+2. Read the CLAUDE.md for coordination rules
+3. Execute your assigned tasks
+4. Create/modify files only in your designated domain
+5. Import shared types from the contracts directory
+6. Report progress and blockers
+
+## Progress Log
+
+Add notes here as you work:
+
+"""
+
+# Initial prompt handed to each agent; sections are separated by blank lines
+_PROMPT_TEMPLATE = (
+    "You are the {agent} agent.\n\n"
+    "\n## Working Directories\n\n"
+    "- **Project directory** (where you modify code): {project_dir}\n\n"
+    "- **Workspace directory** (where orchestration files live): {workspace_dir}\n\n"
+    "\nYou execute in the project directory. All code changes happen there.\n\n"
+    "Read WORKPLAN.md and write PROGRESS.md to the workspace directory."
+    "{workplan}"
+    "{context}\n\n"
+    "\n\n## File Locations\n\n"
+    "- Read: {workspace_dir}/WORKPLAN.md\n\n"
+    "- Read: {workspace_dir}/CLAUDE.md (if exists)\n\n"
+    "- Write: {workspace_dir}/PROGRESS.md\n\n"
+    "- Modify code in: {project_dir}/\n\n"
+    "\nStart working on your assigned tasks. Report progress as you go."
+)
+
+
+def _fmt_section(heading: str, text: Optional[str]) -> str:
+    """Render an optional prompt section, or nothing when it is empty."""
+    if not text:
+        return ""
+    return f"\n\n{heading}\n\n{text}"
+
+
+def _claude_argv(agent_spec_path: str) -> List[str]:
+    """Build the claude argv that runs one agent spec."""
+    return ["claude", "--agent", agent_spec_path, "--dangerously-skip-permissions"]
+
+
+@dataclass
+class AgentInvocation:
+    """How to launch one agent: run argv in cwd with stdin fed to it."""
+    cwd: str
+    argv: List[str]
+    stdin: str
+    spec_path: str
+
+
 class AgentSpawner:
     """Spawn Claude Code agents with context from spec files."""
 
@@ -20,8 +86,27 @@ class AgentSpawner:
             include_claude_agents: Whether to also load agents from ~/.claude/agents/
         """
         self.agent_team_dir = agent_team_dir
+        self._agent_team_dir_str = str(agent_team_dir)
         self.include_claude_agents = include_claude_agents
-        self.agent_specs = self._load_agent_specs()
+        self._claude_agents_dir = os.path.join(str(Path.home()), '.claude', 'agents')
+        # directory -> (st_mtime_ns, agents found in it)
+        self._dir_cache: Dict[str, Tuple[int, Dict[str, str]]] = {}
+        # launch command -> the prompt file it reads and then removes
+        self._prompt_files: Dict[str, str] = {}
+
+    @functools.cached_property
+    def agent_specs(self) -> Dict[str, str]:
+        """Mapping of agent_name -> agent_spec_path, scanned on first access."""
+        return self._load_agent_specs()
+
+    def refresh_agent_specs(self) -> Dict[str, str]:
+        """
+        Reload agent specs, re-scanning only directories whose mtime changed.
+
+        Returns the refreshed agent_name -> agent_spec_path mapping.
+        """
+        self.__dict__.pop('agent_specs', None)
+        return self.agent_specs
 
     def _load_agent_specs(self) -> Dict[str, str]:
         """
@@ -36,42 +121,132 @@ class AgentSpawner:
         agent_specs = {}
 
         # First load from agent-team directory (lower priority)
-        agent_dir = Path(self.agent_team_dir)
-        agent_specs.update(self._load_from_directory(agent_dir))
+        agent_specs.update(self._load_from_directory(self._agent_team_dir_str))
 
         # Then load from ~/.claude/agents/ (higher priority, will override)
         if self.include_claude_agents:
-            claude_agents_dir = Path.home() / '.claude' / 'agents'
-            if claude_agents_dir.exists():
-                agent_specs.update(self._load_from_directory(claude_agents_dir))
+            agent_specs.update(self._load_from_directory(self._claude_agents_dir))
 
         return agent_specs
 
-    def _load_from_directory(self, directory: Path) -> Dict[str, str]:
-        """Load agent specs from a specific directory."""
+    def _load_from_directory(self, directory: str) -> Dict[str, str]:
+        """
+        Load agent specs from a specific directory.
+
+        Results are cached per directory and reused while the directory's
+        mtime (which changes when entries are added, removed or renamed)
+        stays the same.
+        """
         agents = {}
 
-        if not directory.exists():
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return agents
+
+        cached = self._dir_cache.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            it = os.scandir(directory)
+        except OSError:
+            # Missing or unreadable directories contribute no agents
             return agents
 
-        # Look for all .md files that aren't README, CLAUDE, or WORKPLAN
-        for md_file in directory.glob("*.md"):
-            filename = md_file.name.lower()
+        # Look for all .md files that aren't README, CLAUDE, or WORKPLAN.
+        # scandir exposes the dirent type, so only symlinks need a stat.
+        with it:
+            for entry in it:
+                name = entry.name
+                if not name.endswith('.md'):
+                    continue
+                if name.lower() in _SKIP_FILES:
+                    continue
+                if not entry.is_file():
+                    continue
+
+                # Extract agent name from filename (e.g., "frontend-architect.md" -> "frontend-architect")
+                agents[name[:-3]] = os.path.join(directory, name)
+
+        self._dir_cache[directory] = (mtime, agents)
+        return agents
 
-            if filename in ["readme.md", "claude.md", "workplan.template.md"]:
-                continue
+    def _resolve_one(self, agent_name: str) -> Optional[str]:
+        """
+        Resolve the spec path for a single agent.
 
-            # Extract agent name from filename (e.g., "frontend-architect.md" -> "frontend-architect")
-            agent_name = md_file.stem
+        Probes the expected file in each directory (same priority as
+        _load_agent_specs) instead of enumerating them, unless the full
+        listing has already been loaded.
+        """
+        if 'agent_specs' in self.__dict__:
+            return self.agent_specs.get(agent_name)
 
-            agents[agent_name] = str(md_file)
+        filename = f"{agent_name}.md"
+        if os.sep in filename or filename.lower() in _SKIP_FILES:
+            return None
 
-        return agents
+        directories = [self._agent_team_dir_str]
+        if self.include_claude_agents:
+            directories.insert(0, self._claude_agents_dir)
+
+        for directory in directories:
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                return path
+
+        return None
 
     def get_available_agents(self) -> List[str]:
         """Get list of available agent names."""
         return list(self.agent_specs.keys())
 
+    def generate_agent_invocation(
+        self,
+        agent_name: str,
+        project_dir: str,
+        workspace_dir: Optional[str] = None,
+        task_context: Optional[str] = None,
+        workplan_section: Optional[str] = None
+    ) -> AgentInvocation:
+        """
+        Build the argv, working directory and initial prompt for an agent.
+
+        Callers that start Claude Code themselves can run argv directly and
+        write stdin to the process, with no shell involved.
+
+        Args:
+            agent_name: Name of the agent to spawn
+            project_dir: Project directory to work in (where code lives)
+            workspace_dir: Workspace directory (where WORKPLAN.md, PROGRESS.md live)
+            task_context: Optional additional context for the agent
+            workplan_section: Optional section from WORKPLAN.md for this agent
+        """
+        agent_spec_path = self._resolve_one(agent_name)
+        if agent_spec_path is None:
+            raise ValueError(f"Unknown agent: {agent_name}")
+
+        # Default workspace to project dir if not specified
+        if workspace_dir is None:
+            workspace_dir = project_dir
+
+        # Build the initial prompt for the agent
+        initial_prompt = _PROMPT_TEMPLATE.format(
+            agent=agent_name,
+            project_dir=project_dir,
+            workspace_dir=workspace_dir,
+            workplan=_fmt_section("\n## Your Assigned Tasks\n", workplan_section),
+            context=_fmt_section("\n## Additional Context\n", task_context),
+        )
+
+        return AgentInvocation(
+            cwd=project_dir,
+            argv=_claude_argv(agent_spec_path),
+            stdin=initial_prompt + "\n",
+            spec_path=agent_spec_path,
+        )
+
     def generate_agent_command(
         self,
         agent_name: str,
@@ -83,6 +258,14 @@ class AgentSpawner:
         """
         Generate the command to launch a Claude Code agent.
 
+        The initial prompt is written to a private temp file that is
+        redirected into claude and removed once it exits, so the command
+        stays one short line however large the prompt is.
+
+        Calling this creates that file. Only the command itself removes it,
+        so a command that will never run must be passed to discard_command(),
+        and one that has been handed to its shell to release_command().
+
         Args:
             agent_name: Name of the agent to spawn
             project_dir: Project directory to work in (where code lives)
@@ -93,53 +276,121 @@ class AgentSpawner:
         Returns:
             Shell command to launch the agent
         """
-        if agent_name not in self.agent_specs:
-            raise ValueError(f"Unknown agent: {agent_name}")
+        invocation = self.generate_agent_invocation(
+            agent_name,
+            project_dir,
+            workspace_dir=workspace_dir,
+            task_context=task_context,
+            workplan_section=workplan_section
+        )
+        return self._prompt_command(agent_name, project_dir, invocation.spec_path, invocation.stdin)
+
+    def release_command(self, command: str) -> None:
+        """
+        Forget a launch command that has been handed off to run.
 
-        agent_spec_path = self.agent_specs[agent_name]
+        Its prompt file is left for the command itself to remove.
+        """
+        self._prompt_files.pop(command, None)
 
-        # Default workspace to project dir if not specified
+    def discard_command(self, command: str) -> None:
+        """
+        Remove the prompt file of a launch command that will not be run.
+
+        Commands that did not come from this spawner are ignored.
+        """
+        prompt_file = self._prompt_files.pop(command, None)
+        if prompt_file is None:
+            return
+        try:
+            os.unlink(prompt_file)
+        except FileNotFoundError:
+            pass
+
+    def prepare(
+        self,
+        project_dir: str,
+        workspace_dir: Optional[str] = None
+    ) -> Callable[..., str]:
+        """
+        Specialize generate_agent_command for one project.
+
+        The directory parts of the prompt are formatted and the agent specs
+        loaded once, so launching several agents only fills in what differs
+        per agent.
+
+        Args:
+            project_dir: Project directory to work in (where code lives)
+            workspace_dir: Workspace directory (where WORKPLAN.md, PROGRESS.md live)
+
+        Returns:
+            make_command(agent_name, workplan_section=None, task_context=None)
+            returning the same shell command as generate_agent_command (and,
+            like it, writing the agent's prompt file, to be released or
+            discarded the same way)
+        """
         if workspace_dir is None:
             workspace_dir = project_dir
 
-        # Build the initial prompt for the agent
-        prompt_parts = [
-            f"You are the {agent_name} agent.",
-            f"\n## Working Directories",
-            f"- **Project directory** (where you modify code): {project_dir}",
-            f"- **Workspace directory** (where orchestration files live): {workspace_dir}",
-            f"\nYou execute in the project directory. All code changes happen there.",
-            f"Read WORKPLAN.md and write PROGRESS.md to the workspace directory.",
-        ]
-
-        if workplan_section:
-            prompt_parts.append("\n## Your Assigned Tasks\n")
-            prompt_parts.append(workplan_section)
-
-        if task_context:
-            prompt_parts.append("\n## Additional Context\n")
-            prompt_parts.append(task_context)
-
-        prompt_parts.append(f"\n\n## File Locations")
-        prompt_parts.append(f"- Read: {workspace_dir}/WORKPLAN.md")
-        prompt_parts.append(f"- Read: {workspace_dir}/CLAUDE.md (if exists)")
-        prompt_parts.append(f"- Write: {workspace_dir}/PROGRESS.md")
-        prompt_parts.append(f"- Modify code in: {project_dir}/")
-        prompt_parts.append("\nStart working on your assigned tasks. Report progress as you go.")
-
-        initial_prompt = "\n\n".join(prompt_parts)
-
-        # Construct the Claude Code command
-        # Use a heredoc to safely pass the initial prompt without shell interpretation
-        command = f'''cd "{project_dir}" && \\
-echo "=== Starting {agent_name.upper()} ===" && \\
+        # Values substituted now are parsed again by the per-agent format()
+        def escape(text: str) -> str:
+            return text.replace("{", "{{").replace("}", "}}")
+
+        template = _PROMPT_TEMPLATE.format(
+            agent="{agent}",
+            project_dir=escape(project_dir),
+            workspace_dir=escape(workspace_dir),
+            workplan="{workplan}",
+            context="{context}",
+        )
+        specs = self.agent_specs
+
+        def make_command(
+            agent_name: str,
+            workplan_section: Optional[str] = None,
+            task_context: Optional[str] = None
+        ) -> str:
+            agent_spec_path = specs.get(agent_name)
+            if agent_spec_path is None:
+                raise ValueError(f"Unknown agent: {agent_name}")
+
+            prompt = template.format(
+                agent=agent_name,
+                workplan=_fmt_section("\n## Your Assigned Tasks\n", workplan_section),
+                context=_fmt_section("\n## Additional Context\n", task_context),
+            )
+            return self._prompt_command(agent_name, project_dir, agent_spec_path, prompt + "\n")
+
+        return make_command
+
+    def _prompt_command(self, agent_name: str, project_dir: str, agent_spec_path: str, prompt: str) -> str:
+        """Write the prompt file and return the tracked command that runs claude on it."""
+        prompt_file = self._write_prompt_file(agent_name, prompt)
+        command = self._launch_command(agent_name, project_dir, agent_spec_path, prompt_file)
+        self._prompt_files[command] = prompt_file
+        return command
+
+    def _launch_command(self, agent_name: str, project_dir: str, agent_spec_path: str, prompt_file: str) -> str:
+        """Build the shell command that runs claude on a prompt file."""
+        # Every interpolated value is shell-quoted, so paths containing
+        # quotes, '$' or backticks reach claude unchanged
+        prompt_file = shlex.quote(prompt_file)
+        return f'''cd {shlex.quote(project_dir)} && \\
+echo {shlex.quote(f"=== Starting {agent_name.upper()} ===")} && \\
 echo && \\
-cat <<'AGENT_PROMPT_EOF' | claude --agent "{agent_spec_path}" --dangerously-skip-permissions
-{initial_prompt}
-AGENT_PROMPT_EOF
+{shlex.join(_claude_argv(agent_spec_path))} < {prompt_file}; rm -f {prompt_file}
 '''
 
-        return command
+    def _write_prompt_file(self, agent_name: str, prompt: str) -> str:
+        """Write an agent's initial prompt to a private temp file."""
+        fd, path = tempfile.mkstemp(prefix=f"agent-team-{agent_name}-", suffix=".md")
+        try:
+            view = memoryview(prompt.encode("utf-8"))
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        return path
 
     def generate_interactive_command(
         self,
@@ -157,12 +408,12 @@ AGENT_PROMPT_EOF
 
         agent_spec_path = self.agent_specs[agent_name]
 
-        command = f'''cd "{project_dir}" && \\
-echo "=== {agent_name.upper()} READY ===" && \\
-echo "Working directory: {project_dir}" && \\
-echo "Agent spec: {agent_spec_path}" && \\
+        command = f'''cd {shlex.quote(project_dir)} && \\
+echo {shlex.quote(f"=== {agent_name.upper()} READY ===")} && \\
+echo {shlex.quote(f"Working directory: {project_dir}")} && \\
+echo {shlex.quote(f"Agent spec: {agent_spec_path}")} && \\
 echo && \\
-claude --agent "{agent_spec_path}" --dangerously-skip-permissions
+{shlex.join(_claude_argv(agent_spec_path))}
 '''
         return command
 
@@ -185,7 +436,7 @@ claude --agent "{agent_spec_path}" --dangerously-skip-permissions
 
         workspace_file = os.path.join(workspace_dir, f"{agent_name}-workspace.md")
 
-        content = f"""# {agent_name.replace('-', ' ').title()} Workspace
+        header = f"""# {agent_name.replace('-', ' ').title()} Workspace
 
 ## Project Directory
 {project_dir}
@@ -196,30 +447,20 @@ claude --agent "{agent_spec_path}" --dangerously-skip-permissions
 ## Your Tasks
 """
 
-        if workplan_section:
-            content += workplan_section
-        else:
-            content += "See WORKPLAN.md in the project directory for your tasks.\n"
-
-        content += """
-
-## Instructions
-
-1. Read the WORKPLAN.md in the project directory
-2. Read the CLAUDE.md for coordination rules
-3. Execute your assigned tasks
-4. Create/modify files only in your designated domain
-5. Import shared types from the contracts directory
-6. Report progress and blockers
-
-## Progress Log
-
-Add notes here as you work:
-
-"""
-
-        with open(workspace_file, 'w') as f:
-            f.write(content)
+        buf = b"".join((
+            header.encode("utf-8"),
+            workplan_section.encode("utf-8") if workplan_section else _WORKSPACE_DEFAULT_TASKS,
+            _WORKSPACE_TEMPLATE_SUFFIX,
+        ))
+
+        # Single unbuffered write; no TextIOWrapper needed for one small file
+        fd = os.open(workspace_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(buf)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
 
         return workspace_file
 
@@ -242,3 +483,6 @@ if __name__ == "__main__":
         workplan_section="- Build the dashboard\n- Create login page"
     )
     print(cmd)
+
+    # The command is only printed, so nothing else will remove its prompt file
+    spawner.discard_command(cmd)
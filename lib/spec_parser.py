@@ -4,10 +4,21 @@ Parse WORKPLAN.md and CLAUDE.md to extract task assignments and agent requiremen
 """
 import os
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Pattern, Tuple
 from dataclasses import dataclass
 
 
+# Patterns used while parsing WORKPLAN.md, compiled once at import
+_FIELD_NAME = re.compile(r'\*\*Name\*\*:\s*(.+)')
+_FIELD_DESC = re.compile(r'\*\*Description\*\*:\s*(.+)')
+_TECH_RE = re.compile(r'\*\*Tech Stack\*\*:\s*\n((?:- .+\n)+)')
+_CONTRACTS_HEADER = '## Shared Contracts\n\n'
+_CONTRACTS_LOCATION_RE = re.compile(r'Location:\s*`([^`]+)`')
+_AGENT_SPLIT_RE = re.compile(r'\n##\s+@([\w-]+)\s+Tasks\s*\n')
+_TASK_RE = re.compile(r'- \[[ x]\]\s+(.+)')
+_PHASE_RE = re.compile(r'###\s+(.+)')
+
+
 @dataclass
 class AgentTask:
     """Represents a task assigned to a specific agent."""
@@ -36,10 +47,36 @@ class SpecParser:
         self.project_dir = project_dir
         self.workplan_path = os.path.join(project_dir, 'WORKPLAN.md')
         self.claude_md_path = os.path.join(project_dir, 'CLAUDE.md')
-
-    def parse(self) -> ProjectSpec:
-        """Parse the project specification."""
-        workplan_exists = os.path.exists(self.workplan_path)
+        self._cache: Optional[Tuple[int, int, ProjectSpec]] = None  # (mtime_ns, size, spec)
+        self._context_cache: Dict[str, Optional[str]] = {}
+
+    def parse(self, workplan_stat: Optional[os.stat_result] = None) -> ProjectSpec:
+        """
+        Parse the project specification.
+
+        The result is memoized on WORKPLAN.md's mtime and size, so repeated
+        calls against an unchanged file skip the read and regex work.
+
+        Args:
+            workplan_stat: os.stat() of WORKPLAN.md if the caller already has
+                it; saves stat-ing the file again
+        """
+        st = workplan_stat
+        if st is None:
+            try:
+                st = os.stat(self.workplan_path)
+            except FileNotFoundError:
+                st = None
+
+        cache = self._cache
+        if st is not None and cache is not None and \
+                cache[0] == st.st_mtime_ns and cache[1] == st.st_size:
+            return cache[2]
+
+        self._cache = None
+        self._context_cache = {}
+
+        workplan_exists = st is not None
         claude_md_exists = os.path.exists(self.claude_md_path)
 
         if not workplan_exists and not claude_md_exists:
@@ -55,19 +92,18 @@ class SpecParser:
         shared_contracts = None
 
         if workplan_exists:
-            with open(self.workplan_path, 'r') as f:
-                content = f.read()
+            content, st = self._read_workplan()
 
             # Extract project overview
-            project_name = self._extract_field(content, r'\*\*Name\*\*:\s*(.+)')
-            description = self._extract_field(content, r'\*\*Description\*\*:\s*(.+)')
+            project_name = self._extract_field(content, _FIELD_NAME)
+            description = self._extract_field(content, _FIELD_DESC)
             tech_stack = self._extract_tech_stack(content)
             shared_contracts = self._extract_shared_contracts(content)
 
             # Extract agent tasks
             agent_tasks = self._extract_agent_tasks(content)
 
-        return ProjectSpec(
+        spec = ProjectSpec(
             project_name=project_name or "Unknown Project",
             description=description or "",
             tech_stack=tech_stack,
@@ -75,18 +111,46 @@ class SpecParser:
             shared_contracts=shared_contracts
         )
 
-    def _extract_field(self, content: str, pattern: str) -> Optional[str]:
-        """Extract a single field using regex."""
-        match = re.search(pattern, content)
+        if st is not None:
+            self._cache = (st.st_mtime_ns, st.st_size, spec)
+
+        return spec
+
+    def _read_workplan(self) -> Tuple[str, os.stat_result]:
+        """
+        Read WORKPLAN.md with a single pread, bypassing buffered text IO.
+
+        Returns the content and the fstat of the file that was read, so the
+        cache key always matches the bytes parsed.
+        """
+        fd = os.open(self.workplan_path, os.O_RDONLY)
+        try:
+            st = os.fstat(fd)
+            data = os.pread(fd, st.st_size, 0)
+            # pread may return less than asked for; stop early if truncated
+            while len(data) < st.st_size:
+                chunk = os.pread(fd, st.st_size - len(data), len(data))
+                if not chunk:
+                    break
+                data += chunk
+        finally:
+            os.close(fd)
+
+        content = data.decode('utf-8')
+        # Match text-mode open(): universal newlines
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content, st
+
+    def _extract_field(self, content: str, pattern: Pattern[str]) -> Optional[str]:
+        """Extract a single field using a compiled regex."""
+        match = pattern.search(content)
         return match.group(1).strip() if match else None
 
     def _extract_tech_stack(self, content: str) -> Dict[str, str]:
         """Extract technology stack information."""
         tech_stack = {}
-        tech_section = re.search(
-            r'\*\*Tech Stack\*\*:\s*\n((?:- .+\n)+)',
-            content
-        )
+        tech_section = _TECH_RE.search(content)
 
         if tech_section:
             for line in tech_section.group(1).split('\n'):
@@ -98,11 +162,16 @@ class SpecParser:
 
     def _extract_shared_contracts(self, content: str) -> Optional[str]:
         """Extract shared contracts section."""
-        contracts_match = re.search(
-            r'## Shared Contracts\n\n.+?Location:\s*`([^`]+)`',
-            content,
-            re.DOTALL
-        )
+        # Equivalent to r'## Shared Contracts\n\n.+?Location:...' with DOTALL,
+        # but finds both literals directly instead of a lazy per-char scan
+        # (which walked to EOF whenever Location: directly followed the header).
+        header = content.find(_CONTRACTS_HEADER)
+        if header < 0:
+            return None
+
+        # .+? required at least one character after the header
+        start = header + len(_CONTRACTS_HEADER) + 1
+        contracts_match = _CONTRACTS_LOCATION_RE.search(content, start)
         return contracts_match.group(1) if contracts_match else None
 
     def _extract_agent_tasks(self, content: str) -> Dict[str, AgentTask]:
@@ -110,7 +179,7 @@ class SpecParser:
         agent_tasks = {}
 
         # Find all agent sections
-        sections = re.split(r'\n##\s+@([\w-]+)\s+Tasks\s*\n', content)
+        sections = _AGENT_SPLIT_RE.split(content)
 
         # sections will be: [preamble, agent1, content1, agent2, content2, ...]
         for i in range(1, len(sections), 2):
@@ -124,7 +193,7 @@ class SpecParser:
             tasks = self._parse_task_section(section_content)
 
             # Get first phase name if available
-            phase_match = re.search(r'###\s+(.+)', section_content)
+            phase_match = _PHASE_RE.search(section_content)
             phase = phase_match.group(1).strip() if phase_match else "Main"
 
             agent_tasks[agent_name] = AgentTask(
@@ -140,7 +209,7 @@ class SpecParser:
         """Parse individual tasks from a section."""
         tasks = []
         # Find all checkbox items
-        task_matches = re.finditer(r'- \[[ x]\]\s+(.+)', content)
+        task_matches = _TASK_RE.finditer(content)
         for match in task_matches:
             tasks.append(match.group(1).strip())
         return tasks
@@ -154,7 +223,12 @@ class SpecParser:
         """Get the full context for a specific agent."""
         spec = self.parse()
 
+        # parse() resets this cache whenever the spec is rebuilt
+        if agent_name in self._context_cache:
+            return self._context_cache[agent_name]
+
         if agent_name not in spec.agent_tasks:
+            self._context_cache[agent_name] = None
             return None
 
         agent_task = spec.agent_tasks[agent_name]
@@ -175,6 +249,7 @@ class SpecParser:
 
         context += f"\n## Your Tasks\n\n{agent_task.section_content}\n"
 
+        self._context_cache[agent_name] = context
         return context
 
 
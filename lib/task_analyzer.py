@@ -2,9 +2,18 @@
 """
 Task analyzer - determines which agents are needed based on project spec.
 """
+import os
 import re
-from typing import List, Set, Dict, Optional
-from pathlib import Path
+from typing import List, Set, Dict, Optional, Tuple
+
+try:
+    import ahocorasick  # optional: pyahocorasick, single-pass keyword scan
+except ImportError:
+    ahocorasick = None
+
+
+# Explicit agent mentions in a workplan (@agent-name)
+_EXPLICIT_AGENT_RE = re.compile(r'@([\w-]+)')
 
 
 class TaskAnalyzer:
@@ -59,7 +68,40 @@ class TaskAnalyzer:
         Args:
             available_agents: List of available agent names
         """
-        self.available_agents = set(available_agents)
+        self.available_agents = frozenset(available_agents)
+        # Keyword lists for available agents only, lowercased once up front
+        self._active_keyword_map: Dict[str, Tuple[str, ...]] = {
+            agent: tuple(keyword.lower() for keyword in keywords)
+            for agent, keywords in self.KEYWORD_AGENT_MAP.items()
+            if agent in self.available_agents
+        }
+        self._keyword_automaton = self._build_keyword_automaton()
+        # Last (workplan_content, result) seen by analyze_workplan
+        self._last_workplan: Optional[Tuple[str, List[str]]] = None
+
+    def _build_keyword_automaton(self):
+        """
+        Build an Aho-Corasick automaton over all keywords of available agents.
+
+        Returns None when pyahocorasick is not installed, in which case
+        _analyze_by_keywords falls back to one str.count pass per keyword.
+        """
+        if ahocorasick is None:
+            return None
+
+        keyword_agents: Dict[str, List[str]] = {}
+        for agent, keywords in self._active_keyword_map.items():
+            for keyword in keywords:
+                keyword_agents.setdefault(keyword, []).append(agent)
+
+        if not keyword_agents:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for keyword, agents in keyword_agents.items():
+            automaton.add_word(keyword, (keyword, len(keyword), tuple(agents)))
+        automaton.make_automaton()
+        return automaton
 
     def analyze_workplan(self, workplan_content: str) -> List[str]:
         """
@@ -71,6 +113,12 @@ class TaskAnalyzer:
         Returns:
             List of agent names to spawn
         """
+        # The same content is often analyzed twice (directly and through
+        # determine_agents); reuse the last result for identical input
+        last = self._last_workplan
+        if last is not None and last[0] == workplan_content:
+            return list(last[1])
+
         required_agents = set()
 
         # First, check for explicit @agent mentions
@@ -82,14 +130,15 @@ class TaskAnalyzer:
             keyword_agents = self._analyze_by_keywords(workplan_content)
             required_agents.update(keyword_agents)
 
-        # Filter to only available agents
-        required_agents = required_agents.intersection(self.available_agents)
+        # Both lookups only return available agents, so no filtering is needed
 
         # If still no agents found, use fallback
         if not required_agents and self.FALLBACK_AGENT in self.available_agents:
             required_agents.add(self.FALLBACK_AGENT)
 
-        return sorted(list(required_agents))
+        result = sorted(required_agents)
+        self._last_workplan = (workplan_content, result)
+        return list(result)
 
     def analyze_project_structure(self, project_dir: str) -> List[str]:
         """
@@ -102,65 +151,80 @@ class TaskAnalyzer:
             List of agent names to spawn
         """
         required_agents = set()
-        project_path = Path(project_dir)
+
+        # One directory read answers every top-level check; only descend
+        # into src/ or .github/ when they exist as directories. Symlinks
+        # count only if their target exists, as with os.path.exists.
+        entries: Optional[Dict[str, bool]] = {}
+        try:
+            with os.scandir(project_dir) as it:
+                for entry in it:
+                    if entry.is_symlink() and not os.path.exists(entry.path):
+                        continue
+                    entries[entry.name] = entry.is_dir()
+        except (FileNotFoundError, NotADirectoryError):
+            entries = {}
+        except OSError:
+            # Unreadable but maybe still traversable: probe each name instead
+            entries = None
+
+        def has_any(*names: str) -> bool:
+            if entries is None:
+                return any(os.path.exists(os.path.join(project_dir, name)) for name in names)
+            return any(name in entries for name in names)
+
+        def has_subdir(parent: str, child: str) -> bool:
+            if entries is None:
+                is_dir = os.path.isdir(os.path.join(project_dir, parent))
+            else:
+                is_dir = entries.get(parent, False)
+            return is_dir and os.path.exists(os.path.join(project_dir, parent, child))
 
         # Check for frontend indicators
-        if any([
-            (project_path / 'frontend').exists(),
-            (project_path / 'client').exists(),
-            (project_path / 'web').exists(),
-            (project_path / 'src' / 'components').exists(),
-            (project_path / 'package.json').exists(),
-        ]):
+        if has_any('frontend', 'client', 'web', 'package.json') or \
+                has_subdir('src', 'components'):
             required_agents.add('frontend-architect')
 
         # Check for backend indicators
-        if any([
-            (project_path / 'backend').exists(),
-            (project_path / 'server').exists(),
-            (project_path / 'api').exists(),
-            (project_path / 'requirements.txt').exists(),
-            (project_path / 'go.mod').exists(),
-            (project_path / 'Cargo.toml').exists(),
-        ]):
+        if has_any('backend', 'server', 'api', 'requirements.txt', 'go.mod', 'Cargo.toml'):
             required_agents.add('backend-architect')
 
         # Check for DevOps indicators
-        if any([
-            (project_path / 'Dockerfile').exists(),
-            (project_path / 'docker-compose.yml').exists(),
-            (project_path / '.github' / 'workflows').exists(),
-            (project_path / 'infra').exists(),
-            (project_path / 'terraform').exists(),
-        ]):
+        if has_any('Dockerfile', 'docker-compose.yml', 'infra', 'terraform') or \
+                has_subdir('.github', 'workflows'):
             required_agents.add('devops-engineer')
 
         # Check for test indicators
-        if any([
-            (project_path / 'tests').exists(),
-            (project_path / 'test').exists(),
-            (project_path / '__tests__').exists(),
-        ]):
+        if has_any('tests', 'test', '__tests__'):
             required_agents.add('test-architect')
             required_agents.add('qa-engineer')
 
         # Filter to only available agents
         required_agents = required_agents.intersection(self.available_agents)
 
-        return sorted(list(required_agents))
+        return sorted(required_agents)
 
     def _find_explicit_agents(self, content: str) -> Set[str]:
-        """Find explicitly mentioned agents (@agent-name)."""
+        """Find explicitly mentioned agents (@agent-name) that are available."""
         agents = set()
 
-        # Look for @agent-name patterns
-        pattern = r'@([\w-]+)'
-        matches = re.finditer(pattern, content)
+        # No mentions at all: skip the regex scan entirely
+        if '@' not in content:
+            return agents
 
-        for match in matches:
+        # Look for @agent-name patterns, checking each distinct name once
+        seen = set()
+        for match in _EXPLICIT_AGENT_RE.finditer(content):
             agent_name = match.group(1)
+            if agent_name in seen:
+                continue
+            seen.add(agent_name)
+
             if agent_name in self.available_agents:
                 agents.add(agent_name)
+                # Every agent is already named; the rest of the text can't add any
+                if len(agents) == len(self.available_agents):
+                    break
 
         return agents
 
@@ -170,28 +234,53 @@ class TaskAnalyzer:
         agents = set()
 
         # Score each agent based on keyword matches
+        if self._keyword_automaton is not None:
+            agent_scores = self._score_with_automaton(content_lower)
+        else:
+            agent_scores = self._score_with_count(content_lower)
+
+        # Select agents with scores above threshold (or top N agents)
+        threshold = 2  # At least 2 keyword matches
+        for agent, score in agent_scores.items():
+            if score >= threshold:
+                agents.add(agent)
+
+        return agents
+
+    def _score_with_automaton(self, content_lower: str) -> Dict[str, int]:
+        """Score agents with a single pass of the keyword automaton."""
         agent_scores: Dict[str, int] = {}
+        # Mirror str.count: occurrences of the same keyword never overlap
+        keyword_end: Dict[str, int] = {}
 
-        for agent, keywords in self.KEYWORD_AGENT_MAP.items():
-            if agent not in self.available_agents:
+        for end, (keyword, length, agents) in self._keyword_automaton.iter(content_lower):
+            start = end - length + 1
+            if keyword_end.get(keyword, 0) > start:
                 continue
+            keyword_end[keyword] = end + 1
+
+            for agent in agents:
+                agent_scores[agent] = agent_scores.get(agent, 0) + 1
+
+        return agent_scores
 
+    def _score_with_count(self, content_lower: str) -> Dict[str, int]:
+        """Score agents by counting each keyword separately."""
+        # A single alternation regex looks like one pass, but is several times
+        # slower here than these C-level count() scans, and it credits a
+        # keyword shared by two agents (e.g. 'auth') to only one of them.
+        agent_scores: Dict[str, int] = {}
+
+        for agent, keywords in self._active_keyword_map.items():
             score = 0
             for keyword in keywords:
                 # Count occurrences of each keyword
-                count = content_lower.count(keyword.lower())
-                score += count
+                score += content_lower.count(keyword)
 
             if score > 0:
                 agent_scores[agent] = score
 
-        # Select agents with scores above threshold (or top N agents)
-        threshold = 2  # At least 2 keyword matches
-        for agent, score in agent_scores.items():
-            if score >= threshold:
-                agents.add(agent)
-
-        return agents
+        return agent_scores
 
     def determine_agents(
         self,
@@ -222,7 +311,7 @@ class TaskAnalyzer:
         if not agents and self.FALLBACK_AGENT in self.available_agents:
             agents.add(self.FALLBACK_AGENT)
 
-        return sorted(list(agents))
+        return sorted(agents)
 
 
 if __name__ == "__main__":
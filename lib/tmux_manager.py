@@ -2,27 +2,216 @@
 """
 Tmux session and layout manager for multi-agent orchestration.
 """
+import os
+import select
+import shlex
 import subprocess
+import sys
 import time
-from typing import List, Optional
+from typing import List, Optional, Tuple
+
+
+def _quote_control_arg(arg: str) -> str:
+    """Quote an argument for a tmux command line read in control mode."""
+    # One command per line, so newlines must be escaped; double quotes
+    # still expand $VAR and a leading ~, which are escaped as well
+    quoted = (
+        arg.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("$", "\\$")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+    if quoted.startswith("~"):
+        quoted = "\\" + quoted
+    return f'"{quoted}"'
+
+
+def _escape_separator(arg: str) -> str:
+    """Escape a trailing ';' in a tmux argv argument."""
+    # tmux treats an argument ending in ';' as a separator; '\;' keeps it literal
+    return arg[:-1] + "\\;" if arg.endswith(";") else arg
 
 
 class TmuxManager:
     """Manage tmux sessions and panes for agent visualization."""
 
-    def __init__(self, session_name: str = "agent-team"):
+    # Seconds to wait for a control-mode reply before falling back
+    CONTROL_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        session_name: str = "agent-team",
+        control_mode: bool = False,
+        socket_name: Optional[str] = None
+    ):
+        """
+        Initialize the tmux manager.
+
+        Args:
+            session_name: Name of the tmux session to manage
+            control_mode: Keep one "tmux -C" client attached once the session
+                          exists and send pane commands through it, instead of
+                          spawning a tmux process per command
+            socket_name: Run the session on a private tmux server ("tmux -L")
+                         instead of the user's default one
+        """
         self.session_name = session_name
+        self.control_mode = control_mode
+        self.socket_name = socket_name
+        self._sock_args = ["-L", socket_name] if socket_name else []
+        self._ctrl: Optional[subprocess.Popen] = None
+        self._ctrl_buf = b""
 
-    def session_exists(self) -> bool:
-        """Check if the tmux session already exists."""
-        result = subprocess.run(
-            ["tmux", "has-session", "-t", self.session_name],
-            capture_output=True,
+    def __enter__(self) -> "TmuxManager":
+        self.open_control()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def open_control(self) -> bool:
+        """
+        Attach a persistent control-mode client to the session.
+
+        Returns True if the client is ready; on failure the manager keeps
+        using one tmux process per command.
+        """
+        if self._ctrl is not None:
+            return True
+
+        try:
+            self._ctrl = subprocess.Popen(
+                ["tmux", *self._sock_args, "-C", "attach-session", "-t", self.session_name],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError:
+            return False
+        self._ctrl_buf = b""
+
+        # The server confirms the attach with %session-changed
+        while True:
+            line = self._read_control_line()
+            if line is None or line.startswith("%exit"):
+                self.close()
+                return False
+            if line.startswith("%session-changed"):
+                return True
+
+    def close(self) -> None:
+        """Detach the control-mode client, if one is open."""
+        ctrl, self._ctrl = self._ctrl, None
+        if ctrl is None:
+            return
+
+        try:
+            # EOF on stdin makes the control client detach and exit
+            ctrl.stdin.close()
+            ctrl.wait(timeout=1.0)
+        except (OSError, subprocess.TimeoutExpired):
+            ctrl.kill()
+            ctrl.wait()
+        ctrl.stdout.close()
+
+    def _read_control_line(self) -> Optional[str]:
+        """Read one line from the control client, or None on EOF/timeout."""
+        fd = self._ctrl.stdout.fileno()
+        deadline = time.monotonic() + self.CONTROL_TIMEOUT
+
+        while b"\n" not in self._ctrl_buf:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return None
+            self._ctrl_buf += chunk
+
+        line, self._ctrl_buf = self._ctrl_buf.split(b"\n", 1)
+        return line.decode("utf-8", errors="replace")
+
+    def _control_command(self, args: List[str]) -> Optional[subprocess.CompletedProcess]:
+        """
+        Run one tmux command through the control client.
+
+        Returns None if the client is gone or stops answering; it is closed so
+        the caller can fall back to spawning tmux.
+        """
+        try:
+            line = " ".join(_quote_control_arg(arg) for arg in args) + "\n"
+            self._ctrl.stdin.write(line.encode("utf-8"))
+            self._ctrl.stdin.flush()
+        except OSError:
+            self.close()
+            return None
+
+        # Skip notifications (%output, %window-add, ...) up to our reply,
+        # which tmux frames as %begin ... %end (or %error on failure)
+        output: List[str] = []
+        in_block = False
+        while True:
+            reply = self._read_control_line()
+            if reply is None or (not in_block and reply.startswith("%exit")):
+                self.close()
+                return None
+            if not in_block:
+                in_block = reply.startswith("%begin ")
+            elif reply.startswith("%end ") or reply.startswith("%error "):
+                failed = reply.startswith("%error ")
+                text = "\n".join(output) + "\n" if output else ""
+                return subprocess.CompletedProcess(
+                    ["tmux", *self._sock_args, *args],
+                    1 if failed else 0,
+                    stdout="" if failed else text,
+                    stderr=text if failed else ""
+                )
+            else:
+                output.append(reply)
+
+    def _tmux(self, args: List[str], capture_output: bool = False) -> subprocess.CompletedProcess:
+        """Run a tmux command, through the control client when one is open."""
+        if self._ctrl is not None:
+            result = self._control_command(args)
+            if result is not None:
+                if not capture_output and result.stderr:
+                    sys.stderr.write(result.stderr)
+                return result
+
+        return subprocess.run(
+            ["tmux", *self._sock_args, *map(_escape_separator, args)],
+            capture_output=capture_output,
             text=True
         )
+
+    def session_exists(self) -> bool:
+        """Check if the tmux session already exists."""
+        result = self._tmux(["has-session", "-t", self.session_name], capture_output=True)
         return result.returncode == 0
 
-    def create_session(self, agents: List[str], project_dir: str) -> None:
+    def wait_ready(self, timeout: float = 2.0) -> bool:
+        """
+        Wait until the session exists, polling with exponential backoff.
+
+        Returns True as soon as tmux reports the session, False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+
+        while not self.session_exists():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        return True
+
+    def create_session(
+        self,
+        agents: List[str],
+        project_dir: str,
+        commands: Optional[List[Tuple[int, str]]] = None
+    ) -> List[int]:
         """
         Create a tmux session with panes for each agent.
 
@@ -32,25 +221,28 @@ class TmuxManager:
         - 3-4 agents: 2x2 grid
         - 5-6 agents: 2x3 grid
         - 7+ agents: Dynamic tiling
-        """
-        if self.session_exists():
-            print(f"Tmux session '{self.session_name}' already exists.")
-            user_input = input("Kill and recreate? (y/n): ")
-            if user_input.lower() == 'y':
-                self.kill_session()
-            else:
-                print("Attaching to existing session...")
-                self.attach()
-                return
 
+        Args:
+            agents: Agent names, one pane each
+            project_dir: Working directory for the panes
+            commands: Optional (pane_index, command) pairs to send in the
+                same tmux invocation that builds the layout
+
+        Returns:
+            Pane indices from commands whose command was not sent
+        """
         num_agents = len(agents)
 
         if num_agents == 0:
             raise ValueError("No agents to spawn")
 
+        # Build the whole layout as one command sequence so tmux is only
+        # spawned once; tmux runs ';'-separated commands in order.
+        batch: List[List[str]] = []
+
         # Create initial session with first agent pane
-        subprocess.run([
-            "tmux", "new-session",
+        batch.append([
+            "new-session",
             "-d",  # detached
             "-s", self.session_name,
             "-n", "agents",  # window name
@@ -58,8 +250,8 @@ class TmuxManager:
         ])
 
         # Set status bar to show agent info
-        subprocess.run([
-            "tmux", "set-option",
+        batch.append([
+            "set-option",
             "-t", self.session_name,
             "status-right",
             f"#[fg=green]Agents: {num_agents} #[fg=cyan]| %H:%M"
@@ -68,119 +260,271 @@ class TmuxManager:
         # Create layout based on number of agents
         if num_agents == 1:
             # Single pane, already created
-            self._set_pane_title(0, agents[0])
+            batch.append(self._set_pane_title(0, agents[0]))
 
         elif num_agents == 2:
             # Horizontal split
-            self._split_window("h")  # horizontal split
-            self._set_pane_title(0, agents[0])
-            self._set_pane_title(1, agents[1])
+            batch.append(self._split_window("h"))  # horizontal split
+            batch.append(self._set_pane_title(0, agents[0]))
+            batch.append(self._set_pane_title(1, agents[1]))
 
         elif num_agents <= 4:
             # 2x2 grid
-            self._create_grid_layout(agents, rows=2, cols=2)
+            batch.extend(self._create_grid_layout(agents, rows=2, cols=2))
 
         elif num_agents <= 6:
             # 2x3 grid
-            self._create_grid_layout(agents, rows=2, cols=3)
+            batch.extend(self._create_grid_layout(agents, rows=2, cols=3))
 
         else:
             # Dynamic tiling
-            self._create_tiled_layout(agents)
+            batch.extend(self._create_tiled_layout(agents))
 
         # Set synchronize-panes off (we want independent agents)
-        subprocess.run([
-            "tmux", "set-window-option",
+        batch.append([
+            "set-window-option",
             "-t", self.session_name,
             "synchronize-panes", "off"
         ])
 
+        # Sends go last: they only run once every pane exists, so a failed
+        # batch means none of them were delivered
+        commands = commands or []
+        for pane_index, command in commands:
+            batch.extend(self._send_keys(pane_index, command))
+        unsent = [pane_index for pane_index, _ in commands]
+
+        # No has-session probe: new-session itself reports a duplicate, and
+        # the failed command stops the rest of the batch from running
+        result = self._run_batch(batch)
+        if result.returncode != 0 and "duplicate session" in result.stderr:
+            print(f"Tmux session '{self.session_name}' already exists.")
+            user_input = input("Kill and recreate? (y/n): ")
+            if user_input.lower() == 'y':
+                self.kill_session()
+                result = self._run_batch(batch)
+            else:
+                print("Attaching to existing session...")
+                self.attach()
+                return unsent
+
+        if result.stderr:
+            sys.stderr.write(result.stderr)
+
         print(f"Created tmux session '{self.session_name}' with {num_agents} panes")
 
-    def _split_window(self, direction: str, target: Optional[int] = None) -> None:
-        """Split a tmux pane (h=horizontal, v=vertical)."""
-        cmd = ["tmux", "split-window", f"-{direction}", "-t", self.session_name]
-        if target is not None:
-            cmd.extend(["-t", f"{self.session_name}:{target}"])
-        subprocess.run(cmd)
+        if self.control_mode:
+            self.open_control()
+
+        return unsent if result.returncode != 0 else []
+
+    def _run_batch(self, commands: List[List[str]]) -> subprocess.CompletedProcess:
+        """Run a sequence of tmux commands with a single tmux client."""
+        # A bare "tmux" would run its default command, new-session
+        if not commands:
+            raise ValueError("No tmux commands to run")
 
-    def _set_pane_title(self, pane_index: int, title: str) -> None:
-        """Set the title for a specific pane."""
+        argv = ["tmux", *self._sock_args]
+        for index, command in enumerate(commands):
+            if index:
+                argv.append(";")
+            argv.extend(map(_escape_separator, command))
+        return subprocess.run(argv, capture_output=True, text=True)
+
+    def _split_window(self, direction: str, target: Optional[int] = None) -> List[str]:
+        """Build a command to split a tmux pane (h=horizontal, v=vertical)."""
+        if target is None:
+            return ["split-window", f"-{direction}", "-t", self.session_name]
+        return ["split-window", f"-{direction}", "-t", f"{self.session_name}.{target}"]
+
+    def _set_pane_title(self, pane_index: int, title: str) -> List[str]:
+        """Build a command to set the title for a specific pane."""
         # Send command to display agent name at top of pane
         cmd = f"printf '\\033]2;{title}\\033\\\\'; echo '=== {title.upper()} ==='"
-        subprocess.run([
-            "tmux", "send-keys",
-            "-t", f"{self.session_name}:{pane_index}",
+        return [
+            "send-keys",
+            "-t", f"{self.session_name}.{pane_index}",
             cmd,
             "C-m"  # Enter
-        ])
+        ]
+
+    def _create_grid_layout(self, agents: List[str], rows: int, cols: int) -> List[List[str]]:
+        """Build the commands for a grid layout of agents."""
+        commands = []
 
-    def _create_grid_layout(self, agents: List[str], rows: int, cols: int) -> None:
-        """Create a grid layout for agents."""
         # Create first row
         for i in range(1, cols):
-            self._split_window("h")
+            commands.append(self._split_window("h"))
 
         # Create additional rows
         for row in range(1, rows):
             for col in range(cols):
                 pane_idx = (row - 1) * cols + col
-                self._select_pane(pane_idx)
-                self._split_window("v")
+                commands.append(self._select_pane(pane_idx))
+                commands.append(self._split_window("v"))
 
         # Set pane titles
         for idx, agent in enumerate(agents):
             if idx < rows * cols:
-                self._set_pane_title(idx, agent)
+                commands.append(self._set_pane_title(idx, agent))
 
         # Balance the layout
-        subprocess.run([
-            "tmux", "select-layout",
+        commands.append([
+            "select-layout",
             "-t", self.session_name,
             "tiled"
         ])
 
-    def _create_tiled_layout(self, agents: List[str]) -> None:
-        """Create a tiled layout for many agents."""
-        # Create all panes
+        return commands
+
+    def _create_tiled_layout(self, agents: List[str]) -> List[List[str]]:
+        """Build the commands for a tiled layout of many agents."""
+        commands = []
+
+        # Create all panes, re-tiling after each split so a later split
+        # never runs out of space (a failed command aborts the batch)
         for i in range(1, len(agents)):
-            self._split_window("h" if i % 2 == 0 else "v")
+            commands.append(self._split_window("h" if i % 2 == 0 else "v"))
 
-        # Use tmux's tiled layout
-        subprocess.run([
-            "tmux", "select-layout",
-            "-t", self.session_name,
-            "tiled"
-        ])
+            # Use tmux's tiled layout
+            commands.append([
+                "select-layout",
+                "-t", self.session_name,
+                "tiled"
+            ])
 
         # Set titles
         for idx, agent in enumerate(agents):
-            self._set_pane_title(idx, agent)
+            commands.append(self._set_pane_title(idx, agent))
 
-    def _select_pane(self, pane_index: int) -> None:
-        """Select a specific pane."""
-        subprocess.run([
-            "tmux", "select-pane",
+        return commands
+
+    def _select_pane(self, pane_index: int) -> List[str]:
+        """Build a command to select a specific pane."""
+        return [
+            "select-pane",
             "-t", f"{self.session_name}.{pane_index}"
-        ])
+        ]
 
-    def send_command(self, pane_index: int, command: str) -> None:
-        """Send a command to a specific pane."""
-        subprocess.run([
-            "tmux", "send-keys",
-            "-t", f"{self.session_name}.{pane_index}",
-            command,
-            "C-m"
+    def _send_keys(self, pane_index: int, command: str) -> List[List[str]]:
+        """
+        Build the commands that type a command line into a pane.
+
+        The line goes in literally (-l) so tmux never reads a word of it as
+        a key name; Enter is sent on its own.
+        """
+        target = f"{self.session_name}.{pane_index}"
+        return [
+            ["send-keys", "-l", "-t", target, command],
+            ["send-keys", "-t", target, "C-m"]
+        ]
+
+    def send_command(self, pane_index: int, command: str) -> bool:
+        """Send a command to a specific pane. Returns True if tmux accepted it."""
+        return all(
+            self._tmux(keys).returncode == 0
+            for keys in self._send_keys(pane_index, command)
+        )
+
+    def send_commands_batch(self, pairs: List[Tuple[int, str]]) -> List[int]:
+        """
+        Send commands to several panes at once.
+
+        Args:
+            pairs: (pane_index, command) for each pane
+
+        Returns:
+            Pane indices whose command was not delivered
+        """
+        if not pairs:
+            return []
+
+        # An open control client is already a single process
+        if self._ctrl is not None:
+            return [
+                pane_index for pane_index, command in pairs
+                if not self.send_command(pane_index, command)
+            ]
+
+        result = self._run_batch([
+            keys for pane_index, command in pairs
+            for keys in self._send_keys(pane_index, command)
         ])
+        if result.returncode == 0:
+            return []
+        sys.stderr.write(result.stderr)
+
+        # tmux stops the sequence at the first send-keys whose pane is
+        # missing; everything from there on was not sent
+        panes = self._tmux([
+            "list-panes",
+            "-t", self.session_name,
+            "-F", "#{pane_index}"
+        ], capture_output=True)
+        existing = set(panes.stdout.split()) if panes.returncode == 0 else set()
+        for position, (pane_index, _) in enumerate(pairs):
+            if str(pane_index) not in existing:
+                return [pane_index for pane_index, _ in pairs[position:]]
+        return []
+
+    def wait_pane_ready(self, pane_index: int, timeout: float = 2.0) -> bool:
+        """
+        Wait until a pane exists and has a running process.
+
+        Returns True once tmux reports a pane pid, False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        # display-message falls back to the current pane for a missing
+        # index, so look the pane up in list-panes instead
+        wanted = str(pane_index)
+
+        while True:
+            result = self._tmux([
+                "list-panes",
+                "-t", self.session_name,
+                "-F", "#{pane_index} #{pane_pid}"
+            ], capture_output=True)
+            if result.returncode == 0:
+                for line in result.stdout.splitlines():
+                    index, _, pid = line.partition(" ")
+                    if index == wanted and pid not in ("", "0"):
+                        return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
 
     def attach(self) -> None:
         """Attach to the tmux session."""
-        subprocess.run(["tmux", "attach-session", "-t", self.session_name])
+        self.close()
+        subprocess.run(["tmux", *self._sock_args, "attach-session", "-t", self.session_name])
+
+    def exec_attach(self) -> None:
+        """
+        Replace the current process with tmux attached to the session.
+
+        For callers with nothing left to do after attaching: no child is
+        forked and this does not return on success.
+        """
+        self.close()
+        # exec discards anything still sitting in Python's buffers
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execvp("tmux", ["tmux", *self._sock_args, "attach-session", "-t", self.session_name])
+
+    def command_hint(self, *args: str) -> str:
+        """Render a tmux command line for the user to run against this server."""
+        return shlex.join(["tmux", *self._sock_args, *args])
 
     def kill_session(self) -> None:
         """Kill the tmux session."""
-        if self.session_exists():
-            subprocess.run(["tmux", "kill-session", "-t", self.session_name])
+        # The control client would see the session go away mid-command
+        self.close()
+        result = subprocess.run(
+            ["tmux", *self._sock_args, "kill-session", "-t", self.session_name],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode == 0:
             print(f"Killed tmux session '{self.session_name}'")
 
     def get_pane_count(self) -> int:
@@ -188,11 +532,11 @@ class TmuxManager:
         if not self.session_exists():
             return 0
 
-        result = subprocess.run([
-            "tmux", "list-panes",
+        result = self._tmux([
+            "list-panes",
             "-t", self.session_name,
             "-F", "#{pane_index}"
-        ], capture_output=True, text=True)
+        ], capture_output=True)
 
         return len(result.stdout.strip().split('\n'))
 
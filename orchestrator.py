@@ -4,26 +4,52 @@ Multi-Agent Team Orchestrator
 
 Launches a team of Claude Code agents in tmux panes to work on a project.
 """
+from __future__ import annotations
+
 import os
 import sys
 import argparse
-import time
+import functools
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from spec_parser import ProjectSpec
+
+LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib')
 
-# Add lib directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib'))
 
-from spec_parser import SpecParser, ProjectSpec
-from task_analyzer import TaskAnalyzer
-from tmux_manager import TmuxManager
-from agent_spawner import AgentSpawner
+def _cache_dir() -> str:
+    """Per-user cache directory for state kept between orchestrator runs."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'agent-team')
+
+
+def _write_cache_file(path: str, data: bytes) -> None:
+    """Atomically replace a cache file. Caching is best-effort, so errors are ignored."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
 
 
 class AgentOrchestrator:
     """Main orchestrator for the multi-agent system."""
 
-    def __init__(self, project_dir: str, agent_team_dir: Optional[str] = None, workspace_dir: Optional[str] = None):
+    def __init__(
+        self,
+        project_dir: str,
+        agent_team_dir: Optional[str] = None,
+        workspace_dir: Optional[str] = None,
+        socket_name: Optional[str] = None
+    ):
         """
         Initialize the orchestrator.
 
@@ -33,24 +59,60 @@ class AgentOrchestrator:
                           (defaults to directory containing this script)
             workspace_dir: Directory containing WORKPLAN.md and orchestration files
                          (defaults to project_dir for backward compatibility)
+            socket_name: Private tmux server socket ("tmux -L") to run the
+                       session on (defaults to the user's tmux server)
         """
         self.project_dir = os.path.abspath(project_dir)
 
         if agent_team_dir is None:
-            agent_team_dir = os.path.dirname(os.path.abspath(__file__))
+            agent_team_dir = os.path.dirname(LIB_DIR)  # already absolute
 
         self.agent_team_dir = agent_team_dir
 
         # Workspace directory (where WORKPLAN.md, PROGRESS.md live)
         if workspace_dir is None:
-            workspace_dir = self.project_dir  # Backward compatibility
-        self.workspace_dir = os.path.abspath(workspace_dir)
+            self.workspace_dir = self.project_dir  # Backward compatibility
+        else:
+            self.workspace_dir = os.path.abspath(workspace_dir)
+
+        # Library modules are imported here rather than at module level so
+        # main()'s argument parsing and validation don't pay for them
+        if LIB_DIR not in sys.path:
+            sys.path.insert(0, LIB_DIR)
+        from spec_parser import SpecParser
+        from task_analyzer import TaskAnalyzer
+        from tmux_manager import TmuxManager
+        from agent_spawner import AgentSpawner
 
         # Initialize components (use workspace_dir for spec parser)
         self.spec_parser = SpecParser(self.workspace_dir)
         self.agent_spawner = AgentSpawner(self.agent_team_dir)
         self.task_analyzer = TaskAnalyzer(self.agent_spawner.get_available_agents())
-        self.tmux_manager = TmuxManager("agent-team")
+        self.tmux_manager = TmuxManager("agent-team", socket_name=socket_name)
+
+        # Progress lines are buffered and written once per phase; the whole
+        # run is also kept for last-run.log
+        self._log: List[str] = []
+        self._run_log: List[str] = []
+
+    def _emit(self, line: str = "") -> None:
+        """Queue a progress line for the next flush."""
+        self._log.append(line)
+
+    def _flush_log(self) -> None:
+        """Write the queued progress lines to stdout in one go."""
+        if not self._log:
+            return
+        text = "\n".join(self._log) + "\n"
+        self._log.clear()
+        self._run_log.append(text)
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def _write_run_log(self) -> None:
+        """Save everything printed this run to the cache directory."""
+        path = os.path.join(_cache_dir(), 'last-run.log')
+        _write_cache_file(path, "".join(self._run_log).encode('utf-8'))
 
     def analyze_project(self) -> tuple[ProjectSpec, List[str]]:
         """
@@ -59,55 +121,109 @@ class AgentOrchestrator:
         Returns:
             Tuple of (project_spec, required_agents)
         """
-        print("Analyzing project...")
+        self._emit("Analyzing project...")
 
-        # Try to parse spec
         try:
-            spec = self.spec_parser.parse()
-            print(f"  Project: {spec.project_name}")
-            print(f"  Description: {spec.description}")
-
-            # Get agents from workplan
-            required_agents = list(spec.agent_tasks.keys())
-
-            if required_agents:
-                print(f"  Found {len(required_agents)} agents in WORKPLAN.md")
-            else:
-                print("  No agents explicitly defined in WORKPLAN.md")
-                print("  Analyzing project structure...")
-
-                # Fall back to structure analysis
+            # Try to parse spec
+            try:
+                spec = self._parse_spec()
+                self._emit(f"  Project: {spec.project_name}")
+                self._emit(f"  Description: {spec.description}")
+
+                # Get agents from workplan
+                required_agents = list(spec.agent_tasks.keys())
+
+                if required_agents:
+                    self._emit(f"  Found {len(required_agents)} agents in WORKPLAN.md")
+                else:
+                    self._emit("  No agents explicitly defined in WORKPLAN.md")
+                    self._emit("  Analyzing project structure...")
+
+                    # Fall back to structure analysis
+                    required_agents = self.task_analyzer.determine_agents(
+                        project_dir=self.project_dir
+                    )
+
+            except FileNotFoundError:
+                self._emit("  No WORKPLAN.md found - analyzing project structure...")
+                spec = None
                 required_agents = self.task_analyzer.determine_agents(
                     project_dir=self.project_dir
                 )
 
-        except FileNotFoundError:
-            print("  No WORKPLAN.md found - analyzing project structure...")
-            spec = None
-            required_agents = self.task_analyzer.determine_agents(
-                project_dir=self.project_dir
-            )
+            if not required_agents:
+                self._emit("\n  Warning: Could not determine required agents.")
+                self._emit("  Please create a WORKPLAN.md or specify agents manually.")
+                sys.exit(1)
 
-        if not required_agents:
-            print("\n  Warning: Could not determine required agents.")
-            print("  Please create a WORKPLAN.md or specify agents manually.")
-            sys.exit(1)
+            self._emit(f"\n  Required agents ({len(required_agents)}):")
+            for agent in required_agents:
+                self._emit(f"    - {agent}")
 
-        print(f"\n  Required agents ({len(required_agents)}):")
-        for agent in required_agents:
-            print(f"    - {agent}")
+            return spec, required_agents
+        finally:
+            self._flush_log()
 
-        return spec, required_agents
+    def _parse_spec(self) -> ProjectSpec:
+        """
+        Parse the workplan, reusing the result of an earlier run if unchanged.
 
-    def setup_tmux_session(self, agents: List[str]) -> None:
+        The parsed spec is pickled under the user cache directory, keyed by
+        WORKPLAN.md's path, mtime and size and by the mtime of spec_parser
+        itself, so a changed parser or ProjectSpec invalidates old entries.
+        """
+        # Only needed on this path, so --help and argument errors skip them
+        import hashlib
+        import pickle
+        import spec_parser
+
+        workplan_path = self.spec_parser.workplan_path
+        try:
+            st = os.stat(workplan_path)
+        except FileNotFoundError:
+            return self.spec_parser.parse()
+
+        try:
+            parser_mtime = os.stat(spec_parser.__file__).st_mtime_ns
+        except OSError:
+            return self.spec_parser.parse(workplan_stat=st)
+
+        key = (workplan_path, st.st_mtime_ns, st.st_size, parser_mtime)
+        digest = hashlib.sha1(self.workspace_dir.encode('utf-8')).hexdigest()
+        cache_path = os.path.join(_cache_dir(), f"spec-{digest}.pkl")
+
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key, spec = pickle.load(f)
+            if cached_key == key:
+                return spec
+        except Exception:
+            pass  # missing, unreadable or written by an older version
+
+        spec = self.spec_parser.parse(workplan_stat=st)
+        _write_cache_file(cache_path, pickle.dumps((key, spec)))
+        return spec
+
+    def setup_tmux_session(
+        self,
+        agents: List[str],
+        commands: Optional[List[Tuple[int, str]]] = None
+    ) -> List[int]:
         """
         Set up the tmux session with panes for each agent.
 
         Args:
             agents: List of agent names to create panes for
+            commands: Optional (pane_index, command) pairs to start while
+                the session is created
+
+        Returns:
+            Pane indices whose command still has to be sent
         """
-        print(f"\nSetting up tmux session with {len(agents)} panes...")
-        self.tmux_manager.create_session(agents, self.project_dir)
+        self._emit(f"\nSetting up tmux session with {len(agents)} panes...")
+        # Flush first: create_session prints and may prompt for input
+        self._flush_log()
+        return self.tmux_manager.create_session(agents, self.project_dir, commands)
 
     def spawn_agents(self, spec: Optional[ProjectSpec], agents: List[str]) -> None:
         """
@@ -117,29 +233,52 @@ class AgentOrchestrator:
             spec: Project specification (if available)
             agents: List of agents to spawn
         """
-        print("\nSpawning agents...")
-
-        for idx, agent_name in enumerate(agents):
-            print(f"  [{idx + 1}/{len(agents)}] Starting {agent_name}...")
-
-            # Get workplan section for this agent if available
-            workplan_section = None
-            if spec and agent_name in spec.agent_tasks:
-                workplan_section = spec.agent_tasks[agent_name].section_content
+        self._send_agent_commands(self._build_agent_commands(spec, agents), agents)
 
-            # Generate the agent command with workplan tasks
-            command = self.agent_spawner.generate_agent_command(
-                agent_name=agent_name,
-                project_dir=self.project_dir,
-                workspace_dir=self.workspace_dir,
-                workplan_section=workplan_section
-            )
-
-            # Send command to the tmux pane
-            self.tmux_manager.send_command(idx, command)
-
-            # Small delay to avoid overwhelming the system
-            time.sleep(0.5)
+    def _build_agent_commands(self, spec: Optional[ProjectSpec], agents: List[str]) -> List[Tuple[int, str]]:
+        """Generate the (pane_index, command) pair for each agent."""
+        self._emit("\nPreparing agents...")
+        commands = []
+        try:
+            # Directories and agent specs are the same for every agent
+            make_command = self.agent_spawner.prepare(self.project_dir, self.workspace_dir)
+
+            for idx, agent_name in enumerate(agents):
+                self._emit(f"  [{idx + 1}/{len(agents)}] Preparing {agent_name}...")
+
+                # Get workplan section for this agent if available
+                workplan_section = None
+                if spec and agent_name in spec.agent_tasks:
+                    workplan_section = spec.agent_tasks[agent_name].section_content
+
+                # Generate the agent command with workplan tasks
+                command = make_command(agent_name, workplan_section=workplan_section)
+                commands.append((idx, command))
+        except BaseException:
+            # None of these will run, so nothing else removes their prompt files
+            for _, command in commands:
+                self.agent_spawner.discard_command(command)
+            raise
+        finally:
+            self._flush_log()
+
+        return commands
+
+    def _send_agent_commands(self, commands: List[Tuple[int, str]], agents: List[str]) -> None:
+        """Send commands to their panes, retrying panes that weren't ready."""
+        # Send every command to its tmux pane in one go; only a pane that
+        # wasn't ready gets waited on and retried
+        try:
+            failed = set(self.tmux_manager.send_commands_batch(commands))
+            for idx, command in commands:
+                if idx in failed and not (self.tmux_manager.wait_pane_ready(idx) and
+                                          self.tmux_manager.send_command(idx, command)):
+                    self._emit(f"  Warning: could not start {agents[idx]} in pane {idx}")
+                    self.agent_spawner.discard_command(command)
+                else:
+                    self.agent_spawner.release_command(command)
+        finally:
+            self._flush_log()
 
     def run(self, auto_attach: bool = True) -> None:
         """
@@ -148,43 +287,74 @@ class AgentOrchestrator:
         Args:
             auto_attach: Whether to automatically attach to the tmux session
         """
-        print("=" * 60)
-        print("MULTI-AGENT ORCHESTRATOR")
-        print("=" * 60)
-        print(f"Project: {self.project_dir}\n")
+        # However the run ends (short of exec), print what is still queued
+        # and save the run to last-run.log
+        try:
+            attach = self._orchestrate(auto_attach)
+        finally:
+            self._flush_log()
+            self._write_run_log()
+
+        # Nothing runs after attaching, so become tmux instead of forking it
+        if attach:
+            self.tmux_manager.exec_attach()
+
+    def _orchestrate(self, auto_attach: bool) -> bool:
+        """Run every phase up to attaching. Returns True if tmux should be attached."""
+        self._emit("=" * 60)
+        self._emit("MULTI-AGENT ORCHESTRATOR")
+        self._emit("=" * 60)
+        self._emit(f"Project: {self.project_dir}\n")
 
         # Analyze project and determine agents
         spec, agents = self.analyze_project()
 
-        # Set up tmux session
-        self.setup_tmux_session(agents)
-
-        # Spawn agents in tmux panes
-        self.spawn_agents(spec, agents)
-
-        print("\n" + "=" * 60)
-        print("ORCHESTRATION COMPLETE")
-        print("=" * 60)
-        print(f"\nAll {len(agents)} agents are now running in tmux.")
-        print(f"Session name: {self.tmux_manager.session_name}")
-        print("\nCommands:")
-        print(f"  Attach:  tmux attach-session -t {self.tmux_manager.session_name}")
-        print(f"  Detach:  Press Ctrl+B then D")
-        print(f"  Kill:    tmux kill-session -t {self.tmux_manager.session_name}")
-
-        # Attach to session
-        if auto_attach:
-            print("\nAttaching to tmux session in 2 seconds...")
-            print("(Press Ctrl+C to cancel)")
-            try:
-                time.sleep(2)
-                self.tmux_manager.attach()
-            except KeyboardInterrupt:
-                print("\n\nCanceled. Use the commands above to attach manually.")
-
-
-def main():
-    """CLI entry point."""
+        # Create the session and start every agent with one tmux call
+        commands = self._build_agent_commands(spec, agents)
+        unsent = set(self.setup_tmux_session(agents, commands))
+
+        # Delivered commands remove their own prompt files
+        for idx, command in commands:
+            if idx not in unsent:
+                self.agent_spawner.release_command(command)
+
+        # Anything the session batch couldn't deliver goes over one
+        # control-mode connection (plain tmux calls if it can't be opened)
+        if unsent:
+            with self.tmux_manager:
+                self._send_agent_commands([c for c in commands if c[0] in unsent], agents)
+
+        self._emit("\n" + "=" * 60)
+        self._emit("ORCHESTRATION COMPLETE")
+        self._emit("=" * 60)
+        self._emit(f"\nAll {len(agents)} agents are now running in tmux.")
+
+        # Not attaching: say where the session is and stop here
+        if not auto_attach:
+            self._emit(f"Session: {self.tmux_manager.session_name}")
+            self._emit(f"Attach with: {self.tmux_manager.command_hint('attach-session', '-t', self.tmux_manager.session_name)}")
+            return False
+
+        self._emit(f"Session name: {self.tmux_manager.session_name}")
+        self._emit("\nCommands:")
+        self._emit(f"  Attach:  {self.tmux_manager.command_hint('attach-session', '-t', self.tmux_manager.session_name)}")
+        self._emit(f"  Detach:  Press Ctrl+B then D")
+        self._emit(f"  Kill:    {self.tmux_manager.command_hint('kill-session', '-t', self.tmux_manager.session_name)}")
+
+        # Attach to session. It already exists by now, so there is nothing
+        # left to cancel; --no-attach is the way to skip attaching
+        self._emit("\nAttaching to tmux session...")
+        self._flush_log()
+        if not self.tmux_manager.wait_ready():
+            self._emit(f"\nTmux session '{self.tmux_manager.session_name}' is not running.")
+            return False
+
+        return True
+
+
+@functools.lru_cache(maxsize=1)
+def _parser() -> argparse.ArgumentParser:
+    """Build the command-line parser (once per process)."""
     parser = argparse.ArgumentParser(
         description="Launch a multi-agent development team in tmux",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -198,6 +368,9 @@ Examples:
 
   # Don't auto-attach to tmux
   %(prog)s /path/to/project --no-attach
+
+  # Keep the session off your own tmux server
+  %(prog)s /path/to/project --socket agent-team
         """
     )
 
@@ -224,7 +397,18 @@ Examples:
         default=None
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        '--socket',
+        help='Run the session on a private tmux server with this socket name (tmux -L)',
+        default=None
+    )
+
+    return parser
+
+
+def main():
+    """CLI entry point."""
+    args = _parser().parse_args()
 
     # Validate project directory
     if not os.path.isdir(args.project_dir):
@@ -235,7 +419,8 @@ Examples:
     orchestrator = AgentOrchestrator(
         project_dir=args.project_dir,
         agent_team_dir=args.agent_dir,
-        workspace_dir=args.workspace
+        workspace_dir=args.workspace,
+        socket_name=args.socket
     )
 
     orchestrator.run(auto_attach=not args.no_attach)